@@ -13,7 +13,7 @@ using namespace enzo_hll;
 int main(int argc, char* argv[]) {
     //Argument Validation
     if (argc < 2) {
-        std::cerr << "Usage: " << argv[0] << " <parameter_file.enzo>" << std::endl;
+        std::cerr << "Usage: " << argv[0] << " <parameter_file.enzo> [--binary-output]" << std::endl;
         return 1;
     }
 
@@ -23,6 +23,11 @@ int main(int argc, char* argv[]) {
     Utils::log("Reading parameter file: " + param_file);
     Params params = Utils::parseParameterFile(param_file);
 
+    //Command line flags
+    for (int i = 2; i < argc; ++i) {
+        if (std::string(argv[i]) == "--binary-output") params.binary_output = true;
+    }
+
     //Setup Output Directory
     try {
         if (!fs::exists(params.output_dir)) {
@@ -3,6 +3,8 @@
 #include <cmath>
 #include <algorithm>
 #include <iostream>
+#include <fstream>
+#include <stdexcept>
 #include <vector>
 
 namespace enzo_hll {
@@ -181,9 +183,28 @@ void Solver::runSimulation(Grid &g, const Params &p) {
     Utils::log("Starting Simulation...");
     Utils::log("Output directory: " + p.output_dir);
 
+    //Binary mode appends every snapshot to one stream instead of a CSV per snapshot
+    std::ofstream bin_out;
+    if (p.binary_output) {
+        std::string bin_name = p.output_dir + "/" + Utils::BINARY_SNAPSHOT_NAME;
+        bin_out.open(bin_name, std::ios::binary | std::ios::trunc);
+        if (!bin_out.is_open()) {
+            throw std::runtime_error("Could not open " + bin_name + " for writing.");
+        }
+        Utils::log("Binary output: " + bin_name);
+    }
+
+    auto writeOutput = [&](int idx) {
+        if (p.binary_output) {
+            Utils::writeSnapshotBinary(bin_out, g);
+        } else {
+            std::string fname = p.output_dir + "/" + Utils::formatSnapshotName(idx);
+            Utils::writeSnapshotCSV(fname, g, time);
+        }
+    };
+
     //Initial output
-    std::string fname = p.output_dir + "/" + Utils::formatSnapshotName(snapshot_idx++);
-    Utils::writeSnapshotCSV(fname, g, time);
+    writeOutput(snapshot_idx++);
 
     while (time < p.t_final) {
         double dt = computeCFL(g, p.cfl, p.gamma);
@@ -201,8 +222,7 @@ void Solver::runSimulation(Grid &g, const Params &p) {
         time_since_last_output += dt;
 
         if (time_since_last_output >= p.output_dt) {
-            fname = p.output_dir + "/" + Utils::formatSnapshotName(snapshot_idx++);
-            Utils::writeSnapshotCSV(fname, g, time);
+            writeOutput(snapshot_idx++);
             
             time_since_last_output = 0.0;
             
@@ -211,8 +231,15 @@ void Solver::runSimulation(Grid &g, const Params &p) {
         }
     }
 
-    fname = p.output_dir + "/" + Utils::formatSnapshotName(snapshot_idx);
-    Utils::writeSnapshotCSV(fname, g, time);
+    writeOutput(snapshot_idx);
+
+    //Buffered bytes can still fail on the final flush
+    if (p.binary_output) {
+        bin_out.flush();
+        if (!bin_out.good()) {
+            throw std::runtime_error("Failed to flush binary snapshots to disk.");
+        }
+    }
 
     Utils::log("Simulation Complete.");
 }
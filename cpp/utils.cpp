@@ -6,6 +6,7 @@
 #include <ctime>
 #include <cmath>
 #include <map>
+#include <stdexcept>
 
 namespace enzo_hll {
 namespace Utils {
@@ -18,6 +19,7 @@ Params parseParameterFile(const std::string &path) {
     p.output_dt = 0.01;
     p.output_dir = "data/outputs";
     p.bc_type = "outflow";
+    p.binary_output = false;
     p.left_rho = 1.0; p.left_u = 0.0; p.left_p = 1.0;
     p.right_rho = 0.125; p.right_u = 0.0; p.right_p = 0.1;
     p.interface_position = 0.5;
@@ -109,6 +111,33 @@ void writeSnapshotCSV(const std::string &filename, const Grid &g, double time) {
     outfile.close();
 }
 
+void writeSnapshotBinary(std::ofstream &out, const Grid &g) {
+    const auto& cells = g.cells();
+    int nx = g.size();
+    double dx = g.dx();
+    double start_x = g.getX0();
+
+    std::vector<Primitive> prims = g.primitives();
+
+    //Pack the whole snapshot so it goes out in a single write
+    const int n_vars = 5;
+    std::vector<double> buf(static_cast<size_t>(nx) * n_vars);
+
+    for (int i = 0; i < nx; i++) {
+        double* row = &buf[static_cast<size_t>(i) * n_vars];
+        row[0] = start_x + (i + 0.5) * dx;
+        row[1] = prims[i].rho;
+        row[2] = prims[i].u;
+        row[3] = prims[i].p;
+        row[4] = cells[i].energy;
+    }
+
+    out.write(reinterpret_cast<const char*>(buf.data()), buf.size() * sizeof(double));
+    if (!out.good()) {
+        throw std::runtime_error("Failed to write binary snapshot (disk full?)");
+    }
+}
+
 std::string formatSnapshotName(int step, int width) {
     std::ostringstream ss;
     ss << "snapshot_" << std::setw(width) << std::setfill('0') << step << ".csv";
@@ -3,6 +3,7 @@
 
 #include <string>
 #include <vector>
+#include <fstream>
 #include "grid.h"
 
 namespace enzo_hll {
@@ -24,6 +25,8 @@ struct Params {
     double interface_position;
     
     std::string bc_type;
+
+    bool binary_output;     //Stream snapshots to a single raw binary file instead of CSVs
 };
 
 //I/O and String Helpers
@@ -40,6 +43,18 @@ namespace Utils {
      */
     void writeSnapshotCSV(const std::string &filename, const Grid &g, double time);
 
+    /**
+     *Name of the binary snapshot stream inside the output directory.
+     */
+    constexpr const char* BINARY_SNAPSHOT_NAME = "snapshots.bin";
+
+    /**
+     *Appends one snapshot to an open binary stream as raw float64 in native byte order.
+     *Each snapshot is nx rows of: x, rho, u, p, energy (same columns as the CSV).
+     *Throws std::runtime_error if the write fails, a short file would otherwise read back as fewer snapshots.
+     */
+    void writeSnapshotBinary(std::ofstream &out, const Grid &g);
+
     /**
      *Formats an integer step into a zero-padded string (similar to how ENZO does :D, "snapshot_00001.csv")
      */
@@ -1,5 +1,12 @@
 import os
-import re
+
+#Essential simulation parameters
+_REQUIRED = frozenset({
+    'nx', 'x0', 'x1', 't_final', 'cfl', 'gamma', 
+    'output_dt', 'interface_position', 'bc_type',
+    'left_rho', 'left_u', 'left_p',
+    'right_rho', 'right_u', 'right_p'
+})
 
 def parse_params(filepath):
     """
@@ -12,22 +19,22 @@ def parse_params(filepath):
 
     params = {}
     
-    #Regex
-    pattern = re.compile(r'^\s*([a-zA-Z0-9_]+)\s*=\s*([^#\n]+)')
-    
     with open(filepath, 'r') as f:
         for line in f:
             line = line.strip()
-            if not line or line.startswith('#'):
+            #Cheap checks first: a line without '=' can never be an assignment
+            if not line or line[0] == '#' or '=' not in line:
                 continue
             
-            match = pattern.match(line)
-            if match:
-                key = match.group(1).strip()
-                val_str = match.group(2).strip()
-                
-                value = _infer_type(val_str)
-                params[key] = value
+            #key = value  # optional comment
+            key, _, rest = line.partition('=')
+            key = key.strip()
+            val_str = rest.partition('#')[0].strip()
+            if not key.isidentifier() or not val_str:
+                continue
+
+            value = _infer_type(val_str)
+            params[key] = value
 
     _validate_required_keys(params)
     return params
@@ -35,27 +42,20 @@ def parse_params(filepath):
 def _infer_type(val_str):
     """
     Heuristic to convert string values to int, float, or keep as string.
+    A '.' or exponent marks a float, anything else is tried as an int, so each value is parsed at most once.
     """
-    if re.match(r'^-?\d+$', val_str):
+    try:
+        if any(c in val_str for c in '.eE'):
+            return float(val_str)
         return int(val_str)
-    
-    if re.match(r'^-?\d+(\.\d+)?([eE][+-]?\d+)?$', val_str):
-        return float(val_str)
-    
-    return val_str
+    except ValueError:
+        return val_str
 
 def _validate_required_keys(params):
     """
     Ensures essential simulation parameters are present.
     """
-    required = [
-        'nx', 'x0', 'x1', 't_final', 'cfl', 'gamma', 
-        'output_dt', 'interface_position', 'bc_type',
-        'left_rho', 'left_u', 'left_p',
-        'right_rho', 'right_u', 'right_p'
-    ]
-    
-    missing = [k for k in required if k not in params]
+    missing = sorted(_REQUIRED.difference(params))
     if missing:
         raise ValueError(f"Missing required parameters in .enzo file: {missing}")
 
@@ -1,22 +1,59 @@
 import os
 import sys
 import subprocess
+import shutil
 import glob
 import numpy as np
 import pandas as pd
 import json
 import time
+from concurrent.futures import ThreadPoolExecutor
 from parser import parse_params
 
 #Config
 CPP_DIR = "cpp"
+BUILD_DIR = "build" #Object files for incremental builds
+FLAGS_STAMP = os.path.join(BUILD_DIR, "cxxflags.txt") #Records the CXXFLAGS the objects were built with
 DATA_DIR = "data"
 OUTPUTS_DIR = os.path.join(DATA_DIR, "outputs")
 BINARY_NAME = "nikhil_hll"
+CXXFLAGS = ["-O3", "-march=native", "-ffast-math", "-funroll-loops", "-std=c++17", "-DNDEBUG"]
+BINARY_SNAPSHOT = os.path.join(OUTPUTS_DIR, "snapshots.bin")
+SNAPSHOT_COLUMNS = ['x', 'rho', 'u', 'p', 'energy'] #Column order written by the C++ binary
+SIM_DTYPE = np.float32 #Storage precision of simulation.npy, plenty for plotting
+TRANSPOSE_CHUNK_BYTES = 64 * 1024 * 1024 #Raw snapshot bytes transposed per block when reading snapshots.bin
 
-def compile_cpp():
+def _is_stale(target, deps):
+    """
+    Make-style check: True if target is missing or older than any of its dependencies.
+    """
+    if not os.path.exists(target):
+        return True
+    target_mtime = os.path.getmtime(target)
+    return any(os.path.getmtime(d) > target_mtime for d in deps)
+
+def _update_flags_stamp():
+    """
+    Rewrites FLAGS_STAMP only when CXXFLAGS changed, so its mtime marks every object built with other flags as stale.
+    """
+    flags = " ".join(CXXFLAGS)
+    if os.path.exists(FLAGS_STAMP):
+        with open(FLAGS_STAMP, 'r') as f:
+            if f.read() == flags:
+                return
+    with open(FLAGS_STAMP, 'w') as f:
+        f.write(flags)
+
+def _compile_object(src, obj):
+    cmd = ["g++"] + CXXFLAGS + ["-c", src, "-o", obj]
+    print(f"[run.py] {' '.join(cmd)}")
+    subprocess.check_call(cmd)
+
+def compile_cpp(force=False):
     """
     Compiles the C++ source files into a binary.
+    Incremental: each .cpp is compiled to its own object in BUILD_DIR, and only objects older than their source,
+    any header, or the last CXXFLAGS change are rebuilt, in parallel. With force, everything is rebuilt and relinked.
     """
     print(f"[run.py] Compiling C++ code in {CPP_DIR}...")
     
@@ -26,81 +63,177 @@ def compile_cpp():
         os.path.join(CPP_DIR, "solver.cpp"),
         os.path.join(CPP_DIR, "utils.cpp")
     ]
-    
-    cmd = ["g++", "-O3", "-std=c++17"] + sources + ["-o", BINARY_NAME]
+    headers = glob.glob(os.path.join(CPP_DIR, "*.h"))
+
+    os.makedirs(BUILD_DIR, exist_ok=True)
+    _update_flags_stamp()
+
+    objects = [os.path.join(BUILD_DIR, os.path.splitext(os.path.basename(src))[0] + ".o") for src in sources]
+    stale = [(src, obj) for src, obj in zip(sources, objects) if force or _is_stale(obj, [src, FLAGS_STAMP] + headers)]
     
     try:
+        with ThreadPoolExecutor(max_workers=os.cpu_count()) as ex:
+            list(ex.map(lambda so: _compile_object(*so), stale)) #list() re-raises compile errors
+
+        if not stale and not _is_stale(BINARY_NAME, objects + [FLAGS_STAMP]):
+            print(f"[run.py] Binary is up to date: ./{BINARY_NAME}")
+            return
+
+        cmd = ["g++"] + CXXFLAGS + objects + ["-o", BINARY_NAME]
+        print(f"[run.py] {' '.join(cmd)}")
         subprocess.check_call(cmd)
         print(f"[run.py] Compilation successful. Binary: ./{BINARY_NAME}")
     except subprocess.CalledProcessError:
         print(f"[run.py] Compilation failed!")
         sys.exit(1)
 
-def run_simulation(param_file):
+def run_simulation(param_file, binary_output=False):
     """
     Invokes the C++ binary with the given parameter file.
+    With binary_output, the binary streams all snapshots into a single raw float64 file instead of CSVs.
     """
     if not os.path.exists(BINARY_NAME):
         compile_cpp()
         
     print(f"[run.py] Running simulation with {param_file}...")
     
-    if os.path.exists(OUTPUTS_DIR):
-        for f in glob.glob(os.path.join(OUTPUTS_DIR, "*.csv")):
-            os.remove(f)
-    else:
-        os.makedirs(OUTPUTS_DIR)
+    #Drop stale snapshots wholesale, OUTPUTS_DIR only ever holds solver output
+    if os.path.isdir(OUTPUTS_DIR):
+        shutil.rmtree(OUTPUTS_DIR)
+    os.makedirs(OUTPUTS_DIR, exist_ok=True)
 
     try:
         start_time = time.time()
         # Call C++ binary
-        subprocess.check_call([f"./{BINARY_NAME}", param_file])
+        cmd = [f"./{BINARY_NAME}", param_file]
+        if binary_output:
+            cmd.append("--binary-output")
+        subprocess.check_call(cmd)
         elapsed = time.time() - start_time
         print(f"[run.py] Simulation finished in {elapsed:.2f}s.")
     except subprocess.CalledProcessError:
         print("[run.py] Simulation binary crashed.")
         sys.exit(1)
 
-def aggregate_data(params):
+def _read_snapshot(fname):
     """
-    Reads CSV snapshots and stacks them into a single .npy array, also saves a JSON metadata file for visualization context.
+    Parses a single CSV snapshot with pandas' C engine (much faster than np.loadtxt).
+    """
+    return pd.read_csv(fname, header=0, dtype=np.float64, engine='c', memory_map=True)
+
+def _map_binary_snapshots(params):
+    """
+    Memory-maps the raw float64 snapshot stream written with --binary-output (native byte order, same host as the solver).
+    Returns:
+        tuple: (sim_data, cols) where sim_data is a read-only (nt, nx, nvars) np.memmap
+    """
+    cols = list(SNAPSHOT_COLUMNS)
+    nx = params['nx']
+    n_vars = len(cols)
+
+    frame_bytes = nx * n_vars * np.dtype('=f8').itemsize
+    file_bytes = os.path.getsize(BINARY_SNAPSHOT)
+    if file_bytes == 0 or file_bytes % frame_bytes != 0:
+        raise ValueError(f"{BINARY_SNAPSHOT} size ({file_bytes} bytes) is not a multiple of one snapshot ({frame_bytes} bytes)")
+    n_steps = file_bytes // frame_bytes
+
+    sim_data = np.memmap(BINARY_SNAPSHOT, dtype='=f8', mode='r', shape=(n_steps, nx, n_vars))
+    return sim_data, cols
+
+def _load_csv_snapshots(out_npy):
+    """
+    Parses the CSV snapshots straight into a memory-mapped .npy file, one snapshot at a time.
+    Returns:
+        tuple: (sim_data, cols) where sim_data is the (nvars, nt, nx) memmap backing out_npy, or (None, None) if no snapshots exist
     """
-    print("[run.py] Aggregating data...")
-    
     #Find all snapshot files
-    csv_files = sorted(glob.glob(os.path.join(OUTPUTS_DIR, "snapshot_*.csv")))
+    with os.scandir(OUTPUTS_DIR) as entries:
+        csv_files = sorted(e.path for e in entries if e.name.startswith("snapshot_") and e.name.endswith(".csv"))
     if not csv_files:
-        print("[run.py] No output files found!")
-        return
+        return None, None
 
     #Inspect dimensions
-    df_0 = pd.read_csv(csv_files[0])
+    df_0 = _read_snapshot(csv_files[0])
     nx = len(df_0)
     cols = df_0.columns.tolist() # e.g. ['x', 'rho', 'u', 'p', 'energy']
     n_vars = len(cols)
     n_steps = len(csv_files)
-    
-    print(f"[run.py] Found {n_steps} snapshots. Grid: {nx} cells. Vars: {cols}")
 
-    sim_data = np.zeros((n_steps, nx, n_vars), dtype=np.float64)
-    times = []
+    sim_data = np.lib.format.open_memmap(out_npy, mode='w+', dtype=SIM_DTYPE, shape=(n_vars, n_steps, nx))
 
-    #Load data
-    for t_idx, fname in enumerate(csv_files):
-        data = np.loadtxt(fname, delimiter=',', skiprows=1)
-        sim_data[t_idx, :, :] = data
-        times.append(t_idx * params['output_dt'])
+    #Load data, first snapshot is already parsed
+    sim_data[:, 0, :] = df_0.to_numpy().T
 
-    #Save data & metadata
+    #pandas' C parser releases the GIL, so threads parse files concurrently. Each worker fills its own slot.
+    def load_slot(t_idx):
+        sim_data[:, t_idx, :] = _read_snapshot(csv_files[t_idx]).to_numpy().T
+
+    with ThreadPoolExecutor(max_workers=os.cpu_count()) as ex:
+        list(ex.map(load_slot, range(1, n_steps))) #list() re-raises worker errors
+
+    return sim_data, cols
+
+def aggregate_data(params, compress=False):
+    """
+    Stacks the snapshots (binary stream if present, CSVs otherwise) into a single .npy array, also saves a JSON metadata file for visualization context.
+    The array is stored variable-major, (nvars, nt, nx), so each variable's time series is one contiguous block.
+    Values are downcast to SIM_DTYPE on write.
+    With compress, the array is repacked into a DEFLATE-compressed simulation.npz (key 'sim') and the .npy is removed.
+    """
+    print("[run.py] Aggregating data...")
+
+    #Snapshots are written straight into the final .npy, never held in RAM as a whole
     out_npy = os.path.join(DATA_DIR, "simulation.npy")
-    np.save(out_npy, sim_data)
-    print(f"[run.py] Saved simulation data to {out_npy}")
+    out_npz = os.path.join(DATA_DIR, "simulation.npz")
+
+    if os.path.exists(BINARY_SNAPSHOT):
+        raw, cols = _map_binary_snapshots(params)
+        n_steps, nx, n_vars = raw.shape
+        sim_data = np.lib.format.open_memmap(out_npy, mode='w+', dtype=SIM_DTYPE, shape=(n_vars, n_steps, nx))
+        #Transpose in blocks of whole snapshots so each page of snapshots.bin is read once
+        chunk = max(1, TRANSPOSE_CHUNK_BYTES // (nx * n_vars * raw.itemsize))
+        for t0 in range(0, n_steps, chunk):
+            sim_data[:, t0:t0 + chunk] = raw[t0:t0 + chunk].transpose(2, 0, 1)
+    else:
+        sim_data, cols = _load_csv_snapshots(out_npy)
+
+    if sim_data is None:
+        print("[run.py] No output files found!")
+        return
+
+    _, n_steps, nx = sim_data.shape
+    print(f"[run.py] Found {n_steps} snapshots. Grid: {nx} cells. Vars: {cols}")
+
+    #Snapshot times go to their own .npy rather than a JSON list of n_steps floats
+    times = np.arange(n_steps, dtype=np.float64) * params['output_dt']
+    out_times = os.path.join(DATA_DIR, "times.npy")
+    np.save(out_times, times)
+
+    #Save data & metadata
+    sim_data.flush()
+    shape = list(sim_data.shape)
+
+    if compress:
+        np.savez_compressed(out_npz, sim=sim_data) #written in chunks straight from the memmap
+        del sim_data
+        os.remove(out_npy)
+        out_data = out_npz
+    else:
+        #Don't leave a stale archive from an earlier compressed run behind
+        if os.path.exists(out_npz):
+            os.remove(out_npz)
+        out_data = out_npy
+    print(f"[run.py] Saved simulation data to {out_data}")
 
     metadata = {
         "params": params,
         "columns": cols,
-        "times": times, 
-        "shape": list(sim_data.shape)
+        "times_file": os.path.basename(out_times),
+        "n_steps": n_steps,
+        "data_file": os.path.basename(out_data),
+        "shape": shape,
+        "layout": ["var", "time", "x"],
+        "dtype": np.dtype(SIM_DTYPE).name
     }
     
     out_meta = os.path.join(DATA_DIR, "simulation_metadata.json")
@@ -110,13 +243,15 @@ def aggregate_data(params):
 
 def main():
     if len(sys.argv) < 2:
-        print("Usage: python run.py <parameter_file.enzo> [--rebuild]")
+        print("Usage: python run.py <parameter_file.enzo> [--rebuild | --clean] [--binary-output] [--compress]")
         sys.exit(1)
         
     param_file = sys.argv[1]
     
-    #Check for rebuild
-    if "--rebuild" in sys.argv or not os.path.exists(BINARY_NAME):
+    #Check for rebuild: --rebuild is incremental (only stale objects), --clean rebuilds everything
+    if "--clean" in sys.argv:
+        compile_cpp(force=True)
+    elif "--rebuild" in sys.argv or not os.path.exists(BINARY_NAME):
         compile_cpp()
 
     #Parse Params, run sim, aggregate data :D
@@ -126,9 +261,9 @@ def main():
         print(f"[run.py] Error parsing parameters: {e}")
         sys.exit(1)
 
-    run_simulation(param_file)
+    run_simulation(param_file, binary_output="--binary-output" in sys.argv)
 
-    aggregate_data(params)
+    aggregate_data(params, compress="--compress" in sys.argv)
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
@@ -1,5 +1,6 @@
 import os
 import shutil
+import subprocess
 import sys
 import json
 import numpy as np
@@ -10,28 +11,47 @@ plt.style.use('seaborn-v0_8-darkgrid')
 
 def load_simulation(data_dir="data"):
     """
-    Loads simulation data and metadata.
+    Loads simulation data and metadata. A .npy is memory-mapped read-only, so pages are only read from disk when touched;
+    a compressed .npz (run.py --compress) has to be decompressed into memory.
     Returns:
-        tuple: (sim_data, metadata) where sim_data is (nt, nx, nvars) and metadata is a dict
+        tuple: (sim_data, metadata) where sim_data is (nvars, nt, nx) and metadata is a dict
     """
-    npy_path = os.path.join(data_dir, "simulation.npy")
     json_path = os.path.join(data_dir, "simulation_metadata.json")
     
-    if not os.path.exists(npy_path) or not os.path.exists(json_path):
+    if not os.path.exists(json_path):
         print(f"Error: Data not found in {data_dir}. Run the simulation first.")
         sys.exit(1)
-        
-    print(f"Loading data from {npy_path}...")
-    sim_data = np.load(npy_path)
-    
+
     with open(json_path, 'r') as f:
         metadata = json.load(f)
+
+    #Snapshot times live in their own .npy; legacy runs (pre variable-major layout, see below) carry them inline
+    if "times_file" in metadata:
+        metadata["times"] = np.load(os.path.join(data_dir, metadata["times_file"]))
+    else:
+        metadata["times"] = np.asarray(metadata["times"])
+
+    data_path = os.path.join(data_dir, metadata.get("data_file", "simulation.npy"))
+    if not os.path.exists(data_path):
+        print(f"Error: Data not found in {data_dir}. Run the simulation first.")
+        sys.exit(1)
+        
+    print(f"Loading data from {data_path}...")
+    if data_path.endswith(".npz"):
+        with np.load(data_path) as archive:
+            sim_data = archive['sim']
+    else:
+        sim_data = np.load(data_path, mmap_mode='r')
+
+    #Files aggregated before the variable-major layout are (nt, nx, nvars); a transposed view reads them without a copy
+    if "layout" not in metadata:
+        sim_data = sim_data.transpose(2, 0, 1)
         
     return sim_data, metadata
 
 def plot_profiles(sim_data, metadata, output_dir="data/plots"):
     """
-    Generates static profile plots for density, velocity, and pressure at selected time snapshots (Start, Mid, End).
+    Generates a static profile figure (density, velocity, and pressure panels) at selected time snapshots (Start, Mid, End).
     """
     if not os.path.exists(output_dir):
         os.makedirs(output_dir)
@@ -48,39 +68,69 @@ def plot_profiles(sim_data, metadata, output_dir="data/plots"):
         print(f"Error: Missing expected column in data: {e}")
         return
 
-    n_steps = sim_data.shape[0]
+    n_steps = sim_data.shape[1]
     indices = np.linspace(0, n_steps - 1, 6, dtype=int)
     
-    #Create a figure for each variable
-    vars_to_plot = [
-        ('Density', idx_rho, 'rho'),
-        ('Velocity', idx_u, 'u'),
-        ('Pressure', idx_p, 'p')
+    #One figure, one panel per variable
+    labels = ['Density', 'Velocity', 'Pressure']
+
+    #Gather the selected snapshots once: xs is (n_sel, nx), ys is (3, n_sel, nx)
+    xs = sim_data[idx_x, indices]
+    ys = sim_data[np.ix_([idx_rho, idx_u, idx_p], indices)]
+    time_labels = [f"t = {times[i]:.3f}" for i in indices]
+
+    fig, axes = plt.subplots(3, 1, figsize=(10, 15), sharex=True)
+
+    for k, (ax, label) in enumerate(zip(axes, labels)):
+        ax.plot(xs.T, ys[k].T, label=time_labels)
+        ax.set_title(f"1D HLL Shock Tube: {label}")
+        ax.set_ylabel(label)
+        ax.legend()
+
+    axes[-1].set_xlabel("Position (x)")
+    fig.tight_layout()
+
+    save_path = os.path.join(output_dir, "profiles.png")
+    fig.savefig(save_path, dpi=150)
+    print(f"Saved plot: {save_path}")
+    plt.close(fig)
+
+def _stream_to_ffmpeg(fig, update, n_frames, output_file, fps=8, dpi=150):
+    """
+    Renders each frame and pipes the raw RGBA canvas straight into ffmpeg, no per-frame image encoding.
+    """
+    fig.set_dpi(dpi)
+    fig.canvas.draw()
+    width, height = fig.canvas.get_width_height(physical=True)
+
+    cmd = [
+        'ffmpeg', '-y', '-loglevel', 'error',
+        '-f', 'rawvideo', '-pix_fmt', 'rgba', '-s', f'{width}x{height}', '-r', str(fps), '-i', '-',
+        '-vf', 'pad=ceil(iw/2)*2:ceil(ih/2)*2', #yuv420p needs even dimensions
+        '-c:v', 'libx264', '-pix_fmt', 'yuv420p', output_file
     ]
-    
-    for label, var_idx, filename_suffix in vars_to_plot:
-        plt.figure(figsize=(10, 6))
-        
-        for i in indices:
-            t = times[i]
-            x = sim_data[i, :, idx_x]
-            y = sim_data[i, :, var_idx]
-            plt.plot(x, y, label=f"t = {t:.3f}")
-            
-        plt.title(f"1D HLL Shock Tube: {label}")
-        plt.xlabel("Position (x)")
-        plt.ylabel(label)
-        plt.legend()
-        plt.tight_layout()
-        
-        save_path = os.path.join(output_dir, f"profile_{filename_suffix}.png")
-        plt.savefig(save_path, dpi=150)
-        print(f"Saved plot: {save_path}")
-        plt.close()
+    proc = subprocess.Popen(cmd, stdin=subprocess.PIPE, stderr=subprocess.PIPE)
+    try:
+        for frame in range(n_frames):
+            update(frame)
+            fig.canvas.draw()
+            proc.stdin.write(fig.canvas.buffer_rgba())
+    except BrokenPipeError:
+        pass #ffmpeg quit early, its exit code and stderr below say why
+    finally:
+        try:
+            proc.stdin.close()
+        except BrokenPipeError:
+            pass
+        stderr = proc.stderr.read().decode(errors='replace').strip()
+        proc.wait()
+
+    if proc.returncode != 0:
+        raise RuntimeError(f"ffmpeg exited with code {proc.returncode}: {stderr}")
 
 def create_animation(sim_data, metadata, output_file="data/plots/simulation.gif"):
     """
-    Creates a gif of simulation!
+    Creates a gif of simulation! An .mp4 output_file is encoded by piping raw frames to ffmpeg instead.
     """
 
     print("Generating animation...")
@@ -92,26 +142,31 @@ def create_animation(sim_data, metadata, output_file="data/plots/simulation.gif"
     idx_u = cols.index('u')
     idx_p = cols.index('p')
 
+    #Per-variable (nt, nx) views, contiguous thanks to the variable-major layout, so no copies
+    rho_all = sim_data[idx_rho]
+    u_all = sim_data[idx_u]
+    p_all = sim_data[idx_p]
+
     fig, axes = plt.subplots(3, 1, figsize=(8, 10), sharex=True)
     
     #Initial data
-    x = sim_data[0, :, idx_x]
+    x = sim_data[idx_x, 0]
     
-    line_rho, = axes[0].plot(x, sim_data[0, :, idx_rho], 'r-', lw=2)
+    line_rho, = axes[0].plot(x, rho_all[0], 'r-', lw=2)
     axes[0].set_ylabel('Density')
     axes[0].set_title(f"t = {times[0]:.3f}")
     
-    line_u, = axes[1].plot(x, sim_data[0, :, idx_u], 'g-', lw=2)
+    line_u, = axes[1].plot(x, u_all[0], 'g-', lw=2)
     axes[1].set_ylabel('Velocity')
     
-    line_p, = axes[2].plot(x, sim_data[0, :, idx_p], 'b-', lw=2)
+    line_p, = axes[2].plot(x, p_all[0], 'b-', lw=2)
     axes[2].set_ylabel('Pressure')
     axes[2].set_xlabel('Position')
 
-    #Set axis limits dynamically
-    for ax, idx in zip(axes, [idx_rho, idx_u, idx_p]):
-        data_min = np.min(sim_data[:, :, idx])
-        data_max = np.max(sim_data[:, :, idx])
+    #Set axis limits dynamically, reducing each contiguous view in place (no gather copy of the memmap)
+    for ax, var_all in zip(axes, [rho_all, u_all, p_all]):
+        data_min = var_all.min()
+        data_max = var_all.max()
         margin = (data_max - data_min) * 0.1
         ax.set_ylim(data_min - margin, data_max + margin)
 
@@ -119,15 +174,19 @@ def create_animation(sim_data, metadata, output_file="data/plots/simulation.gif"
         t = times[frame]
         axes[0].set_title(f"t = {t:.3f}")
         
-        line_rho.set_ydata(sim_data[frame, :, idx_rho])
-        line_u.set_ydata(sim_data[frame, :, idx_u])
-        line_p.set_ydata(sim_data[frame, :, idx_p])
+        line_rho.set_ydata(rho_all[frame])
+        line_u.set_ydata(u_all[frame])
+        line_p.set_ydata(p_all[frame])
         return line_rho, line_u, line_p
 
-    anim = animation.FuncAnimation(fig, update, frames=len(times), interval=50, blit=False) #Interval is in ms
-    
     try:
-        anim.save(output_file, writer='pillow', fps=8, dpi=150)
+        if output_file.endswith('.mp4'):
+            if shutil.which('ffmpeg') is None:
+                raise RuntimeError("ffmpeg not found on PATH")
+            _stream_to_ffmpeg(fig, update, len(times), output_file, fps=8, dpi=150)
+        else:
+            anim = animation.FuncAnimation(fig, update, frames=len(times), interval=50, blit=False) #Interval is in ms
+            anim.save(output_file, writer='pillow', fps=8, dpi=150)
         print(f"Saved animation: {output_file}")
     except Exception as e:
         print(f"Error saving animation: {e}")
@@ -144,4 +203,7 @@ if __name__ == "__main__":
     #Plot Profiles and animate!
     plot_profiles(data, meta)
     
-    create_animation(data, meta)
\ No newline at end of file
+    if "--mp4" in sys.argv:
+        create_animation(data, meta, output_file="data/plots/simulation.mp4")
+    else:
+        create_animation(data, meta)
\ No newline at end of file